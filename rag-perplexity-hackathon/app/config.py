@@ -32,6 +32,88 @@ def get_qa_confidence_threshold() -> float:
         return 0.85
 
 
+def get_ingest_batch_size() -> int:
+    """Number of vectors written to the store per batch during ingestion."""
+    try:
+        return max(1, int(os.getenv("INGEST_BATCH_SIZE", "512")))
+    except ValueError:
+        return 512
+
+
+def get_extraction_cache_path() -> str:
+    """SQLite file caching extracted PDF/DOCX text by content hash."""
+    default_path = os.path.join(get_chroma_dir(), "extraction_cache.sqlite3")
+    return os.getenv("EXTRACTION_CACHE_PATH", default_path)
+
+
+def get_extraction_workers() -> int:
+    """Worker processes shared by all uploads for PDF page extraction (at least 1)."""
+    default = min(4, os.cpu_count() or 1)
+    try:
+        return max(1, int(os.getenv("EXTRACTION_WORKERS", str(default))))
+    except ValueError:
+        return default
+
+
+def get_page_timeout() -> float:
+    """Seconds allowed per PDF page before it is skipped."""
+    try:
+        return float(os.getenv("EXTRACTION_PAGE_TIMEOUT", "30"))
+    except ValueError:
+        return 30.0
+
+
+def get_compaction_threshold() -> float:
+    """Fraction (0-1) of deleted vectors that triggers a background index rebuild."""
+    try:
+        return float(os.getenv("COMPACTION_THRESHOLD", "0.2"))
+    except ValueError:
+        return 0.2
+
+
+def get_compaction_min_deleted() -> int:
+    """Minimum number of deleted vectors before a rebuild is considered."""
+    try:
+        return max(0, int(os.getenv("COMPACTION_MIN_DELETED", "1000")))
+    except ValueError:
+        return 1000
+
+
+def get_llm_max_concurrency() -> int:
+    """Maximum number of Perplexity calls in flight at once."""
+    try:
+        return max(1, int(os.getenv("LLM_MAX_CONCURRENCY", "4")))
+    except ValueError:
+        return 4
+
+
+def get_llm_rate_limit() -> tuple[float, int]:
+    """Token-bucket rate limit for Perplexity calls: (calls per second, burst).
+
+    A rate of 0 disables rate limiting.
+    """
+    try:
+        rate = float(os.getenv("LLM_RATE_PER_SEC", "2"))
+    except ValueError:
+        rate = 2.0
+    try:
+        burst = int(os.getenv("LLM_BURST", "4"))
+    except ValueError:
+        burst = 4
+    return max(0.0, rate), max(1, burst)
+
+
+def get_llm_queue_timeout(priority: str) -> float:
+    """Seconds a request may wait for an LLM slot before falling back to retrieval only."""
+    defaults = {"interactive": "10", "batch": "60", "eval": "60"}
+    env_name = f"LLM_QUEUE_TIMEOUT_{priority.upper()}"
+    default = defaults.get(priority, "10")
+    try:
+        return float(os.getenv(env_name, default))
+    except ValueError:
+        return float(default)
+
+
 def get_system_prompt() -> str:
     """System prompt to enforce strict, policy-grounded answers."""
     return os.getenv(
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List
+
+from .config import get_chroma_dir
+
+
+class DocIdIndex:
+    """SQLite-backed mapping of doc_id -> vector ids, plus vector store bookkeeping.
+
+    Tables:
+    - vectors: (vector_id, doc_id); doc_id is NULL for vectors added without one,
+      so every live vector is tracked (compaction copies all of them)
+    - meta: collection (name of the live Chroma collection, changes after
+      compaction) and deleted (vectors deleted since the last rebuild)
+
+    Adds and deletes touch only the affected rows, so cost does not grow with
+    the size of the store.
+    """
+
+    def __init__(self, path: str | None = None, default_collection: str = "documents") -> None:
+        self.path = path or os.path.join(get_chroma_dir(), "vector_index.sqlite3")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors (vector_id TEXT PRIMARY KEY, doc_id TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS vectors_doc_id ON vectors (doc_id)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.exists = self._get_meta("collection") is not None
+        if not self.exists:
+            with self._lock, self._conn:
+                self._set_meta("collection", default_collection)
+                self._set_meta("deleted", "0")
+
+    def _get_meta(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        # Callers hold the lock and an open transaction
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def collection(self) -> str:
+        return self._get_meta("collection") or "documents"
+
+    @property
+    def deleted(self) -> int:
+        return int(self._get_meta("deleted") or 0)
+
+    def live_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+    def all_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT vector_id FROM vectors")]
+
+    def has_doc(self, doc_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM vectors WHERE doc_id = ? LIMIT 1", (doc_id,)).fetchone()
+        return row is not None
+
+    def add(self, doc_id: str | None, ids: Iterable[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (vector_id, doc_id) VALUES (?, ?)",
+                [(_id, doc_id) for _id in ids],
+            )
+
+    def pop(self, doc_id: str) -> List[str]:
+        """Remove a document and return its vector ids (counted as deleted)."""
+        with self._lock, self._conn:
+            ids = [
+                row[0]
+                for row in self._conn.execute("SELECT vector_id FROM vectors WHERE doc_id = ?", (doc_id,))
+            ]
+            self._conn.execute("DELETE FROM vectors WHERE doc_id = ?", (doc_id,))
+            self._set_meta("deleted", str(self.deleted + len(ids)))
+        return ids
+
+    def replace(self, docs: Dict[str | None, List[str]], collection: str | None = None) -> None:
+        """Reset the mapping, e.g. after rebuilding it from collection metadata."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM vectors")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (vector_id, doc_id) VALUES (?, ?)",
+                [(_id, doc_id) for doc_id, ids in docs.items() for _id in ids],
+            )
+            if collection is not None:
+                self._set_meta("collection", collection)
+            self._set_meta("deleted", "0")
+        self.exists = True
+
+    def mark_compacted(self, collection: str, deleted_during: int = 0) -> None:
+        """Point at the rebuilt collection; only deletes made during the rebuild remain."""
+        with self._lock, self._conn:
+            self._set_meta("collection", collection)
+            self._set_meta("deleted", str(deleted_during))
@@ -1,39 +1,39 @@
-import io
-from typing import Literal
+from .extraction import ExtractionResult, PageResult, extract_docx, extract_pdf
 
-import pdfplumber
-from docx import Document
 
+def extract_document(file_bytes: bytes, filename: str) -> ExtractionResult:
+    """Extract text from supported file types (.txt, .pdf, .docx) with per-page timings.
 
-def load_text(file_bytes: bytes, filename: str) -> str:
-    """Extract text from supported file types (.txt, .pdf, .docx).
-
-    Raises ValueError for unsupported or unreadable files.
+    PDF and DOCX text is cached by content hash. Raises ValueError for
+    unsupported or unreadable files.
     """
     name_lower = filename.lower()
 
     if name_lower.endswith(".txt"):
         try:
-            return file_bytes.decode("utf-8", errors="ignore")
+            text = file_bytes.decode("utf-8", errors="ignore")
+            return ExtractionResult(filename=filename, pages=[PageResult(index=0, text=text)])
         except Exception as e:
             raise ValueError(f"Failed to decode TXT file: {e}")
 
     if name_lower.endswith(".pdf"):
         try:
-            text_parts: list[str] = []
-            with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-                for page in pdf.pages:
-                    text_parts.append(page.extract_text() or "")
-            return "\n".join(text_parts).strip()
+            return extract_pdf(file_bytes, filename)
         except Exception as e:
             raise ValueError(f"Failed to read PDF file: {e}")
 
     if name_lower.endswith(".docx"):
         try:
-            doc = Document(io.BytesIO(file_bytes))
-            paras = [p.text for p in doc.paragraphs]
-            return "\n".join(paras).strip()
+            return extract_docx(file_bytes, filename)
         except Exception as e:
             raise ValueError(f"Failed to read DOCX file: {e}")
 
     raise ValueError("Unsupported file type. Please upload .txt, .pdf, or .docx")
+
+
+def load_text(file_bytes: bytes, filename: str) -> str:
+    """Extract text from supported file types (.txt, .pdf, .docx).
+
+    Raises ValueError for unsupported or unreadable files.
+    """
+    return extract_document(file_bytes, filename).text
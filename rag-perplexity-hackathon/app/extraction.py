@@ -0,0 +1,404 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+import pdfplumber
+from docx import Document
+from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
+from pdfminer.psparser import LIT, PSKeyword, PSLiteral
+
+from .config import (
+    get_extraction_cache_path,
+    get_extraction_workers,
+    get_page_timeout,
+)
+
+# Bump when extraction output changes so stale cache entries are ignored
+_CACHE_VERSION = "v2"
+
+LITERAL_IMAGE = LIT("Image")
+
+
+@dataclass
+class PageResult:
+    index: int
+    text: str
+    seconds: float = 0.0
+    cached: bool = False
+    timed_out: bool = False
+
+
+@dataclass
+class ExtractionResult:
+    filename: str
+    pages: List[PageResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def text(self) -> str:
+        return "\n".join(p.text for p in self.pages).strip()
+
+    def summary(self, slowest: int = 5) -> Dict[str, Any]:
+        """Per-upload extraction report: totals plus the slowest pages."""
+        ranked = sorted(self.pages, key=lambda p: p.seconds, reverse=True)[:slowest]
+        return {
+            "pages": len(self.pages),
+            "cached_pages": sum(1 for p in self.pages if p.cached),
+            "timed_out_pages": [p.index for p in self.pages if p.timed_out],
+            "seconds": round(self.seconds, 4),
+            "slowest_pages": [
+                {"page": p.index, "seconds": round(p.seconds, 4)} for p in ranked if not p.cached
+            ],
+        }
+
+
+class ExtractionCache:
+    """SQLite-backed cache of extracted text.
+
+    - pages: page content hash -> extracted text
+    - files: file content hash -> ordered list of page hashes
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path or get_extraction_cache_path()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, text TEXT NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS files (key TEXT PRIMARY KEY, pages TEXT NOT NULL)")
+
+    def get_file(self, key: str) -> List[str] | None:
+        with self._lock:
+            row = self._conn.execute("SELECT pages FROM files WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_file(self, key: str, page_keys: List[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (key, pages) VALUES (?, ?)", (key, json.dumps(page_keys))
+            )
+
+    def get_pages(self, keys: List[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                batch = unique[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, text FROM pages WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_pages(self, items: Dict[str, str]) -> None:
+        if not items:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (key, text) VALUES (?, ?)", list(items.items())
+            )
+
+
+_cache: ExtractionCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ExtractionCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache()
+        return _cache
+
+
+def _hash(*parts: bytes) -> str:
+    h = hashlib.sha256(_CACHE_VERSION.encode())
+    for part in parts:
+        h.update(len(part).to_bytes(8, "big"))
+        h.update(part)
+    return h.hexdigest()
+
+
+# Page attributes that determine extracted text. Resources covers fonts
+# (Encoding, ToUnicode, descriptors) and Form XObjects with their own resources.
+_PAGE_KEY_ATTRS = ("Contents", "Resources", "MediaBox", "CropBox", "Rotate")
+
+
+def _feed(h: Any, data: bytes) -> None:
+    h.update(len(data).to_bytes(8, "big"))
+    h.update(data)
+
+
+def _hash_pdf_object(h: Any, obj: Any, memo: Dict[int, bytes], in_progress: set) -> None:
+    """Feed a PDF object graph into `h`, following references.
+
+    Referenced objects are digested once per file (memo keyed by object id);
+    a reference back to an object still being hashed is recorded as a cycle.
+    """
+    if isinstance(obj, PDFObjRef):
+        objid = obj.objid
+        if objid not in memo:
+            if objid in in_progress:
+                _feed(h, b"cycle")
+                return
+            in_progress.add(objid)
+            sub = hashlib.sha256()
+            _hash_pdf_object(sub, obj.resolve(), memo, in_progress)
+            in_progress.discard(objid)
+            memo[objid] = sub.digest()
+        _feed(h, b"ref:" + memo[objid])
+    elif isinstance(obj, PDFStream):
+        _feed(h, b"stream")
+        _hash_pdf_object(h, obj.attrs, memo, in_progress)
+        # Image data cannot contribute text; skip it to keep hashing cheap
+        if resolve1(obj.attrs.get("Subtype")) != LITERAL_IMAGE:
+            _feed(h, obj.get_data())
+    elif isinstance(obj, dict):
+        _feed(h, b"dict")
+        for key in sorted(obj, key=str):
+            if key == "Parent":
+                # Back-reference to the page tree; would tie the key to the whole file
+                continue
+            _feed(h, str(key).encode())
+            _hash_pdf_object(h, obj[key], memo, in_progress)
+    elif isinstance(obj, (list, tuple)):
+        _feed(h, b"list")
+        for item in obj:
+            _hash_pdf_object(h, item, memo, in_progress)
+    elif isinstance(obj, (PSLiteral, PSKeyword)):
+        _feed(h, b"name:" + str(obj.name).encode())
+    elif isinstance(obj, bytes):
+        _feed(h, b"bytes:" + obj)
+    else:
+        _feed(h, f"{type(obj).__name__}:{obj!r}".encode())
+
+
+def _pdf_page_key(page: Any, memo: Dict[int, bytes]) -> str:
+    """Hash everything on a page that can change its extracted text.
+
+    Identical pages in different files share a key, so their text is reused.
+    """
+    h = hashlib.sha256(_CACHE_VERSION.encode())
+    _feed(h, b"pdf-page")
+    attrs = page.page_obj.attrs
+    for name in _PAGE_KEY_ATTRS:
+        _feed(h, name.encode())
+        _hash_pdf_object(h, attrs.get(name), memo, set())
+    return h.hexdigest()
+
+
+# Seconds a new worker process may take to import its modules and report ready
+_WORKER_START_TIMEOUT = 60.0
+
+
+def _page_worker_main(conn: Any) -> None:
+    """Worker process loop: extract requested pages, keeping the current PDF open.
+
+    Tasks are (file_key, file_bytes, page index); file_bytes is only sent when
+    the file changes. Replies are ("ok", text, seconds) or ("error", message).
+    """
+    pdf = None
+    current = None
+    conn.send(("ready",))
+    while True:
+        try:
+            file_key, file_bytes, index = conn.recv()
+        except EOFError:
+            break
+        try:
+            if file_key != current:
+                if pdf is not None:
+                    pdf.close()
+                current = None
+                pdf = pdfplumber.open(io.BytesIO(file_bytes))
+                current = file_key
+            start = time.perf_counter()
+            page = pdf.pages[index]
+            text = page.extract_text() or ""
+            # Drop the page's parsed objects; the PDF stays open for its next pages
+            page.close()
+            conn.send(("ok", text, time.perf_counter() - start))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class _PageWorker:
+    """One extraction process and the pipe used to send it pages."""
+
+    def __init__(self, target: Any) -> None:
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=target, args=(child,), name="pdf-extraction", daemon=True)
+        self.process.start()
+        child.close()
+        # File whose bytes this worker already has open
+        self.file_key: str | None = None
+        if not self.conn.poll(_WORKER_START_TIMEOUT):
+            self.kill()
+            raise RuntimeError("PDF extraction worker did not start")
+        self.conn.recv()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ExtractionPool:
+    """Long-lived pool of worker processes shared by all uploads.
+
+    Each dispatcher thread owns one worker process and feeds it one page at a
+    time, so run time is measured per page (queue time excluded). A worker
+    still busy after the timeout is killed and replaced.
+    """
+
+    def __init__(self, size: int, target: Any = _page_worker_main) -> None:
+        self.size = max(1, size)
+        self._target = target
+        self._local = threading.local()
+        self._workers: List[_PageWorker] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="pdf-extraction")
+
+    def _worker(self) -> _PageWorker:
+        worker = getattr(self._local, "worker", None)
+        if worker is None:
+            worker = _PageWorker(self._target)
+            with self._lock:
+                self._workers.append(worker)
+            self._local.worker = worker
+        return worker
+
+    def _discard(self, worker: _PageWorker) -> None:
+        worker.kill()
+        with self._lock:
+            self._workers.remove(worker)
+        self._local.worker = None
+
+    def _run_page(self, file_key: str, file_bytes: bytes, index: int, timeout: float) -> PageResult:
+        worker = self._worker()
+        payload = file_bytes if worker.file_key != file_key else None
+        start = time.monotonic()
+        try:
+            worker.conn.send((file_key, payload, index))
+            worker.file_key = file_key
+            if not worker.conn.poll(timeout):
+                print(f"[extraction] Page {index} exceeded {timeout:.0f}s; skipping and restarting its worker")
+                self._discard(worker)
+                return PageResult(index=index, text="", seconds=time.monotonic() - start, timed_out=True)
+            reply = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            self._discard(worker)
+            raise RuntimeError(f"PDF extraction worker exited on page {index}: {e}")
+        if reply[0] == "error":
+            # The worker may have failed to open the file; resend it next time
+            worker.file_key = None
+            raise RuntimeError(f"Page {index}: {reply[1]}")
+        _, text, seconds = reply
+        return PageResult(index=index, text=text, seconds=seconds)
+
+    def extract(self, file_key: str, file_bytes: bytes, indices: List[int], timeout: float) -> Dict[int, PageResult]:
+        """Extract pages of one file; pages running past `timeout` come back empty."""
+        futures = {
+            i: self._executor.submit(self._run_page, file_key, file_bytes, i, timeout) for i in indices
+        }
+        try:
+            return {i: future.result() for i, future in futures.items()}
+        except Exception:
+            # One page failed the file; don't spend workers on the rest of it
+            for future in futures.values():
+                future.cancel()
+            raise
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.kill()
+
+
+_pool: ExtractionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ExtractionPool:
+    """Create the shared pool on first use; workers start as pages arrive."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionPool(get_extraction_workers())
+        return _pool
+
+
+def extract_pdf(file_bytes: bytes, filename: str) -> ExtractionResult:
+    """Extract PDF text page by page, reusing cached pages and sending the rest to the pool."""
+    start = time.perf_counter()
+    cache = get_cache()
+    file_key = _hash(b"pdf-file", file_bytes)
+    result = ExtractionResult(filename=filename)
+
+    page_keys = cache.get_file(file_key)
+    if page_keys is not None:
+        cached = cache.get_pages(page_keys)
+        if all(k in cached for k in page_keys):
+            result.pages = [PageResult(index=i, text=cached[k], cached=True) for i, k in enumerate(page_keys)]
+            result.seconds = time.perf_counter() - start
+            return result
+
+    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+        memo: Dict[int, bytes] = {}
+        page_keys = [_pdf_page_key(page, memo) for page in pdf.pages]
+        cached = cache.get_pages(page_keys)
+        # Extract each uncached page content once, even if it repeats in this file
+        first_index: Dict[str, int] = {}
+        for i, key in enumerate(page_keys):
+            if key not in cached:
+                first_index.setdefault(key, i)
+        missing = list(first_index.values())
+
+    extracted = get_pool().extract(file_key, file_bytes, missing, get_page_timeout())
+
+    for i, key in enumerate(page_keys):
+        if key in cached:
+            result.pages.append(PageResult(index=i, text=cached[key], cached=True))
+        elif first_index[key] == i:
+            result.pages.append(extracted[i])
+        else:
+            source = extracted[first_index[key]]
+            result.pages.append(
+                PageResult(index=i, text=source.text, cached=not source.timed_out, timed_out=source.timed_out)
+            )
+
+    cache.put_pages({page_keys[i]: r.text for i, r in extracted.items() if not r.timed_out})
+    if not any(p.timed_out for p in result.pages):
+        cache.put_file(file_key, page_keys)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def extract_docx(file_bytes: bytes, filename: str) -> ExtractionResult:
+    """Extract DOCX paragraphs; DOCX has no pages, so the whole file is one cached unit."""
+    start = time.perf_counter()
+    cache = get_cache()
+    key = _hash(b"docx-file", file_bytes)
+    cached = cache.get_pages([key])
+    if key in cached:
+        page = PageResult(index=0, text=cached[key], cached=True)
+    else:
+        doc = Document(io.BytesIO(file_bytes))
+        text = "\n".join(p.text for p in doc.paragraphs)
+        page = PageResult(index=0, text=text, seconds=time.perf_counter() - start)
+        cache.put_pages({key: text})
+    return ExtractionResult(filename=filename, pages=[page], seconds=time.perf_counter() - start)
@@ -0,0 +1,208 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+# Lower value = served first
+PRIORITIES: Dict[str, int] = {"interactive": 0, "batch": 1, "eval": 2}
+
+
+class QueueTimeout(RuntimeError):
+    """Raised when a request is not admitted before its queue deadline."""
+
+
+class LLMScheduler:
+    """Admission control for outbound LLM calls.
+
+    - Caps the number of in-flight calls (`max_concurrency`)
+    - Rate limits call starts with a token bucket (`rate_per_sec`, `burst`);
+      a rate of 0 disables rate limiting
+    - Admits waiting requests strictly by priority class, FIFO within a class
+    - Sheds requests that wait longer than their queue deadline
+
+    Thread-safe; callers block in `acquire` (or await `acquire_async` on an
+    event loop) until admitted or timed out.
+    """
+
+    def __init__(self, max_concurrency: int = 4, rate_per_sec: float = 0.0, burst: int = 1) -> None:
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.rate_per_sec = max(0.0, float(rate_per_sec))
+        self.burst = max(1, int(burst))
+
+        self._cond = threading.Condition()
+        self._waiting: List[tuple[int, int]] = []  # heap of (priority, seq)
+        # Queue entry -> (loop, event) for requests waiting in `acquire_async`
+        self._async_waiters: Dict[tuple[int, int], tuple[asyncio.AbstractEventLoop, asyncio.Event]] = {}
+        self._seq = itertools.count()
+        self._active = 0
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._stats: Dict[str, Dict[str, float]] = {
+            name: {"admitted": 0, "shed": 0, "wait_total_s": 0.0, "wait_max_s": 0.0}
+            for name in PRIORITIES
+        }
+
+    def _refill(self, now: float) -> None:
+        if self.rate_per_sec <= 0:
+            self._tokens = float(self.burst)
+            return
+        elapsed = now - self._last_refill
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate_per_sec)
+        self._last_refill = now
+
+    def _next_token_in(self) -> float:
+        if self.rate_per_sec <= 0 or self._tokens >= 1.0:
+            return 0.0
+        return (1.0 - self._tokens) / self.rate_per_sec
+
+    def _record_wait(self, priority: str, waited: float, admitted: bool) -> None:
+        stats = self._stats[priority]
+        stats["admitted" if admitted else "shed"] += 1
+        stats["wait_total_s"] += waited
+        stats["wait_max_s"] = max(stats["wait_max_s"], waited)
+
+    def _notify(self) -> None:
+        # Callers hold self._cond
+        self._cond.notify_all()
+        for loop, event in self._async_waiters.values():
+            loop.call_soon_threadsafe(event.set)
+
+    def _enqueue(self, priority: str) -> tuple[int, int]:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'. Use one of: {', '.join(PRIORITIES)}")
+        entry = (PRIORITIES[priority], next(self._seq))
+        heapq.heappush(self._waiting, entry)
+        return entry
+
+    def _remove(self, entry: tuple[int, int]) -> None:
+        if entry in self._waiting:
+            self._waiting.remove(entry)
+            heapq.heapify(self._waiting)
+            self._notify()
+
+    def _try_admit(
+        self,
+        entry: tuple[int, int],
+        priority: str,
+        start: float,
+        timeout: float | None,
+    ) -> tuple[bool, float | None]:
+        """One admission check; callers hold self._cond.
+
+        Returns (True, waited) once admitted, else (False, seconds to wait before
+        checking again, None meaning until notified). Raises QueueTimeout at the deadline.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        at_head = self._waiting[0] == entry
+        has_slot = self._active < self.max_concurrency
+        if at_head and has_slot and self._tokens >= 1.0:
+            heapq.heappop(self._waiting)
+            self._active += 1
+            self._tokens -= 1.0
+            waited = now - start
+            self._record_wait(priority, waited, admitted=True)
+            # The next request in line may also be admissible
+            self._notify()
+            return True, waited
+
+        deadline = start + timeout if timeout is not None else None
+        if deadline is not None and now >= deadline:
+            self._remove(entry)
+            self._record_wait(priority, now - start, admitted=False)
+            raise QueueTimeout(f"LLM queue wait exceeded {timeout:.1f}s for '{priority}' request")
+
+        wait_for = None
+        if at_head and has_slot:
+            wait_for = self._next_token_in()
+        if deadline is not None:
+            remaining = deadline - now
+            wait_for = remaining if wait_for is None else min(wait_for, remaining)
+        return False, wait_for
+
+    def acquire(self, priority: str = "interactive", timeout: float | None = None) -> float:
+        """Block until admitted and return the time spent queued (seconds).
+
+        Raises QueueTimeout if not admitted within `timeout` seconds.
+        """
+        start = time.monotonic()
+        with self._cond:
+            entry = self._enqueue(priority)
+            while True:
+                admitted, value = self._try_admit(entry, priority, start, timeout)
+                if admitted:
+                    return value
+                self._cond.wait(value)
+
+    async def acquire_async(self, priority: str = "interactive", timeout: float | None = None) -> float:
+        """Like `acquire`, but waits on the event loop instead of blocking a thread.
+
+        Shares the queue with `acquire`, so async and threaded callers are
+        admitted in one priority order.
+        """
+        start = time.monotonic()
+        event = asyncio.Event()
+        with self._cond:
+            entry = self._enqueue(priority)
+            self._async_waiters[entry] = (asyncio.get_running_loop(), event)
+        try:
+            while True:
+                # Clear before checking so a release after the check still wakes us
+                event.clear()
+                with self._cond:
+                    admitted, value = self._try_admit(entry, priority, start, timeout)
+                if admitted:
+                    return value
+                try:
+                    await asyncio.wait_for(event.wait(), value)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            with self._cond:
+                self._remove(entry)
+            raise
+        finally:
+            with self._cond:
+                self._async_waiters.pop(entry, None)
+
+    def release(self) -> None:
+        with self._cond:
+            self._active = max(0, self._active - 1)
+            self._notify()
+
+    @contextmanager
+    def slot(self, priority: str = "interactive", timeout: float | None = None) -> Iterator[float]:
+        """Context manager around acquire/release; yields the queue wait time."""
+        waited = self.acquire(priority, timeout)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, in-flight calls, and per-priority wait times."""
+        with self._cond:
+            depth = {name: 0 for name in PRIORITIES}
+            by_value = {v: k for k, v in PRIORITIES.items()}
+            for prio, _ in self._waiting:
+                depth[by_value[prio]] += 1
+            priorities = {}
+            for name, stats in self._stats.items():
+                total = stats["admitted"] + stats["shed"]
+                priorities[name] = {
+                    "queue_depth": depth[name],
+                    "admitted": int(stats["admitted"]),
+                    "shed": int(stats["shed"]),
+                    "wait_avg_s": stats["wait_total_s"] / total if total else 0.0,
+                    "wait_max_s": stats["wait_max_s"],
+                }
+            return {
+                "in_flight": self._active,
+                "max_concurrency": self.max_concurrency,
+                "queue_depth": len(self._waiting),
+                "rate_per_sec": self.rate_per_sec,
+                "priorities": priorities,
+            }
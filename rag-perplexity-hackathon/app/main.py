@@ -1,13 +1,16 @@
 import os
+from typing import Literal
+
 from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
 
 from .rag_pipeline import RAGPipeline
 from .registry import DocumentRegistry
-from .qa_parser import is_qa_document
-from .document_loader import load_text
+from .qa_parser import BULK_QA_EXTENSIONS, is_qa_document, iter_qa_pairs
+from .document_loader import extract_document
 
 app = FastAPI(title="RAG + Perplexity API", version="1.1.0")
 
@@ -26,6 +29,8 @@ pipeline = RAGPipeline(registry=registry)
 
 class QueryRequest(BaseModel):
     query: str
+    # Interactive traffic is admitted to the LLM ahead of batch/eval traffic
+    priority: Literal["interactive", "batch", "eval"] = "interactive"
 
 
 class QueryResponse(BaseModel):
@@ -61,17 +66,35 @@ async def upload(file: UploadFile = File(...)):
 
         # Basic guard on extension
         name_lower = filename.lower()
-        if not (name_lower.endswith(".txt") or name_lower.endswith(".pdf") or name_lower.endswith(".docx")):
-            raise HTTPException(status_code=400, detail="Unsupported file type. Use .txt, .pdf, or .docx")
-
-        # Detect whether this is a Q&A dataset
-        text_preview = load_text(content, filename)
-        if is_qa_document(text_preview):
-            doc_id, count = pipeline.ingest_qa_text(content, filename)
+        if not name_lower.endswith((".txt", ".pdf", ".docx") + BULK_QA_EXTENSIONS):
+            raise HTTPException(
+                status_code=400, detail="Unsupported file type. Use .txt, .pdf, .docx, .csv or .jsonl"
+            )
+
+        # Structured bulk Q&A sets skip text extraction and detection entirely.
+        # Ingestion (embedding) runs in a worker thread so large sets don't block the event loop.
+        if name_lower.endswith(BULK_QA_EXTENSIONS):
+            doc_id, count = await run_in_threadpool(pipeline.ingest_qa_text, content, filename)
             return {"status": "ok", "filename": filename, "type": "qa", "doc_id": doc_id, "count": count}
+
+        # Extract once (in worker processes, off the event loop), then detect
+        # whether this is a Q&A dataset
+        extraction = await run_in_threadpool(extract_document, content, filename)
+        text = extraction.text
+        if is_qa_document(text):
+            doc_id, count = await run_in_threadpool(pipeline.ingest_qa_pairs, iter_qa_pairs(text), filename)
+            doc_type = "qa"
         else:
-            doc_id, count = pipeline.ingest_file(content, filename)
-            return {"status": "ok", "filename": filename, "type": "doc", "doc_id": doc_id, "count": count}
+            doc_id, count = await run_in_threadpool(pipeline.ingest_text, text, filename)
+            doc_type = "doc"
+        return {
+            "status": "ok",
+            "filename": filename,
+            "type": doc_type,
+            "doc_id": doc_id,
+            "count": count,
+            "extraction": extraction.summary(),
+        }
     except HTTPException:
         raise
     except ValueError as e:
@@ -205,7 +228,8 @@ async def query(req: QueryRequest):
     if not req.query or not req.query.strip():
         raise HTTPException(status_code=400, detail="Query must be a non-empty string")
     try:
-        answer = pipeline.query(req.query)
+        # Waits for LLM admission on the event loop, not in a threadpool thread
+        answer = await pipeline.aquery(req.query, req.priority)
         return QueryResponse(answer=answer)
     except RuntimeError as e:
         # Typically missing API key or Perplexity error
@@ -214,6 +238,12 @@ async def query(req: QueryRequest):
         raise HTTPException(status_code=500, detail=f"Query failed: {e}")
 
 
+@app.get("/metrics")
+async def metrics():
+    """LLM scheduler queue depth and wait times, plus vector store compaction state."""
+    return {"llm": pipeline.scheduler.metrics(), "vector_store": pipeline.vs.stats()}
+
+
 @app.get("/list")
 async def list_items():
     try:
@@ -225,8 +255,8 @@ async def list_items():
 @app.delete("/delete/{doc_id}")
 async def delete_item(doc_id: str):
     try:
-        pipeline.vs.delete_by_doc_id(doc_id)
-        registry.delete(doc_id)
+        await run_in_threadpool(pipeline.vs.delete_by_doc_id, doc_id)
+        await run_in_threadpool(registry.delete, doc_id)
         return {"status": "ok", "deleted": doc_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Delete failed: {e}")
@@ -235,10 +265,8 @@ async def delete_item(doc_id: str):
 @app.post("/clear")
 async def clear():
     try:
-        pipeline.vs.clear()
-        # reset registry
-        for item in registry.list():
-            registry.delete(item["doc_id"])  # simple reset
+        await run_in_threadpool(pipeline.vs.clear)
+        await run_in_threadpool(registry.clear)
         return {"status": "ok", "message": "Vector store cleared"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Clear failed: {e}")
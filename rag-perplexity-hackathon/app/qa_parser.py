@@ -1,9 +1,71 @@
+import csv
+import io
+import json
 import re
-from typing import List, Dict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
 
-_QA_REGEX = re.compile(
-    r"(?ims)^\s*(?:Q(?:uestion)?[:\-]\s*)(.+?)\s*(?:\n|\r\n)\s*(?:A(?:nswer)?[:\-]\s*)(.+?)(?=(?:\n\s*Q(?:uestion)?[:\-]\s*)|\Z)",
-)
+# Line-level markers. Each physical line is matched at most once, so parsing is
+# linear in the size of the input (no backtracking across the whole document).
+_Q_LINE = re.compile(r"(?i)^\s*Q(?:uestion)?[:\-]\s*(.*)$")
+_A_LINE = re.compile(r"(?i)^\s*A(?:nswer)?[:\-]\s*(.*)$")
+
+# File extensions for structured bulk Q&A sets
+BULK_QA_EXTENSIONS = (".csv", ".jsonl")
+
+
+def _make_pair(question_lines: List[str], answer_lines: List[str]) -> Dict[str, str] | None:
+    q = "\n".join(question_lines).strip()
+    a = "\n".join(answer_lines).strip()
+    if q and a:
+        return {"question": q, "answer": a}
+    return None
+
+
+def iter_qa_pairs(source: str | Iterable[str]) -> Iterator[Dict[str, str]]:
+    """Yield Q&A pairs in a single pass over the lines of `source`.
+
+    `source` may be the full text or any iterable of lines (e.g. an open file).
+    A question starts at a `Q:` / `Question:` line and runs until the first
+    `A:` / `Answer:` line; the answer runs until the next question line or the
+    end of input. A question line seen before an answer restarts the question.
+    """
+    if isinstance(source, str):
+        source = io.StringIO(source)
+
+    question: List[str] | None = None
+    answer: List[str] | None = None
+
+    for line in source:
+        line = line.rstrip("\r\n")
+
+        q_match = _Q_LINE.match(line)
+        if q_match:
+            if answer is not None:
+                pair = _make_pair(question or [], answer)
+                if pair:
+                    yield pair
+            question = [q_match.group(1)]
+            answer = None
+            continue
+
+        if question is None:
+            # Preamble before the first question
+            continue
+
+        if answer is None:
+            a_match = _A_LINE.match(line)
+            if a_match:
+                answer = [a_match.group(1)]
+            else:
+                question.append(line)
+        else:
+            answer.append(line)
+
+    if question is not None and answer is not None:
+        pair = _make_pair(question, answer)
+        if pair:
+            yield pair
 
 
 def parse_qa_pairs(text: str) -> List[Dict[str, str]]:
@@ -17,17 +79,71 @@ def parse_qa_pairs(text: str) -> List[Dict[str, str]]:
     Question: ...
     Answer: ...
     """
-    pairs: List[Dict[str, str]] = []
     if not text:
-        return pairs
+        return []
+    return list(iter_qa_pairs(text))
 
-    for m in _QA_REGEX.finditer(text):
-        q = m.group(1).strip()
-        a = m.group(2).strip()
-        if q and a:
-            pairs.append({"question": q, "answer": a})
-    return pairs
+
+def is_qa_document(source: str | Iterable[str], min_pairs: int = 3) -> bool:
+    """Return True once `min_pairs` pairs are found, without parsing the rest.
+
+    `source` may be the full text or any iterable of lines.
+    """
+    if not source:
+        return False
+    return sum(1 for _ in islice(iter_qa_pairs(source), min_pairs)) >= min_pairs
+
+
+def iter_qa_csv(file_bytes: bytes) -> Iterator[Dict[str, str]]:
+    """Yield Q&A pairs from a CSV file with `question` and `answer` header columns.
+
+    Raises ValueError if the header does not contain both columns.
+    """
+    stream = io.StringIO(file_bytes.decode("utf-8-sig", errors="ignore"), newline="")
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [h.strip().lower() for h in header]
+    try:
+        q_idx = columns.index("question")
+        a_idx = columns.index("answer")
+    except ValueError:
+        raise ValueError("CSV Q&A file must have 'question' and 'answer' columns")
+
+    for row in reader:
+        if len(row) <= max(q_idx, a_idx):
+            continue
+        pair = _make_pair([row[q_idx]], [row[a_idx]])
+        if pair:
+            yield pair
+
+
+def iter_qa_jsonl(file_bytes: bytes) -> Iterator[Dict[str, str]]:
+    """Yield Q&A pairs from a JSONL file of {"question": ..., "answer": ...} objects.
+
+    Blank lines are skipped. Raises ValueError on a malformed line.
+    """
+    stream = io.StringIO(file_bytes.decode("utf-8-sig", errors="ignore"))
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_no}: {e}")
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {line_no} must be a JSON object")
+        pair = _make_pair([str(record.get("question") or "")], [str(record.get("answer") or "")])
+        if pair:
+            yield pair
 
 
-def is_qa_document(text: str) -> bool:
-    return len(parse_qa_pairs(text)) >= 3
+def iter_bulk_qa_pairs(file_bytes: bytes, filename: str) -> Iterator[Dict[str, str]]:
+    """Dispatch a structured bulk Q&A file (.csv / .jsonl) to its parser."""
+    name_lower = filename.lower()
+    if name_lower.endswith(".csv"):
+        return iter_qa_csv(file_bytes)
+    if name_lower.endswith(".jsonl"):
+        return iter_qa_jsonl(file_bytes)
+    raise ValueError("Unsupported bulk Q&A file type. Please upload .csv or .jsonl")
@@ -1,5 +1,7 @@
+import asyncio
 import uuid
-from typing import List, Tuple
+from itertools import islice
+from typing import Dict, Iterable, List, Tuple
 import requests
 
 from .config import (
@@ -7,27 +9,47 @@ from .config import (
     get_model_name,
     get_qa_confidence_threshold,
     get_system_prompt,
+    get_ingest_batch_size,
+    get_llm_max_concurrency,
+    get_llm_rate_limit,
+    get_llm_queue_timeout,
 )
 from .document_loader import load_text
 from .utils import chunk_text
 from .vector_store import VectorStore
 from .registry import DocumentRegistry
-from .qa_parser import parse_qa_pairs
+from .qa_parser import BULK_QA_EXTENSIONS, iter_bulk_qa_pairs, iter_qa_pairs
+from .llm_scheduler import LLMScheduler, QueueTimeout
 
 
 class RAGPipeline:
     """Encapsulates the RAG flow: ingest -> embed/store -> retrieve -> generate."""
 
-    def __init__(self, registry: DocumentRegistry | None = None) -> None:
-        self.vs = VectorStore()
+    def __init__(
+        self,
+        registry: DocumentRegistry | None = None,
+        scheduler: LLMScheduler | None = None,
+        vector_store: VectorStore | None = None,
+    ) -> None:
+        self.vs = vector_store or VectorStore()
         self.registry = registry or DocumentRegistry()
+        if scheduler is None:
+            rate, burst = get_llm_rate_limit()
+            scheduler = LLMScheduler(get_llm_max_concurrency(), rate, burst)
+        self.scheduler = scheduler
 
     def ingest_file(self, file_bytes: bytes, filename: str) -> tuple[str, int]:
         """Extract text, split into chunks, and store in the vector DB.
 
         Returns (doc_id, number_of_chunks).
         """
-        text = load_text(file_bytes, filename)
+        return self.ingest_text(load_text(file_bytes, filename), filename)
+
+    def ingest_text(self, text: str, filename: str) -> tuple[str, int]:
+        """Chunk already-extracted text and store it as a `doc` item.
+
+        Returns (doc_id, number_of_chunks).
+        """
         chunks = chunk_text(text, max_len=500, overlap=50)
         doc_id = str(uuid.uuid4())
         metadatas = [
@@ -41,29 +63,53 @@ class RAGPipeline:
     def ingest_qa_text(self, file_bytes: bytes, filename: str) -> tuple[str, int]:
         """Parse Q&A pairs and store them with rich metadata.
 
+        Structured bulk files (.csv / .jsonl) are read directly; other files are
+        extracted with `load_text` and parsed for `Q:` / `A:` pairs.
+        Returns (doc_id, number_of_pairs).
+        """
+        if filename.lower().endswith(BULK_QA_EXTENSIONS):
+            pairs = iter_bulk_qa_pairs(file_bytes, filename)
+        else:
+            pairs = iter_qa_pairs(load_text(file_bytes, filename))
+        return self.ingest_qa_pairs(pairs, filename)
+
+    def ingest_qa_pairs(self, pairs: Iterable[Dict[str, str]], filename: str) -> tuple[str, int]:
+        """Store Q&A pairs in batches as they are produced by a parser.
+
         Each vector embeds the QUESTION text only; metadata contains the answer.
+        If ingestion fails part-way, vectors already written are removed.
         Returns (doc_id, number_of_pairs).
         """
-        text = load_text(file_bytes, filename)
-        pairs = parse_qa_pairs(text)
-        if not pairs:
-            raise ValueError("No Q&A pairs found in uploaded document.")
         doc_id = str(uuid.uuid4())
-        questions = [p["question"].strip() for p in pairs]
-        metadatas = [
-            {
-                "type": "qa",
-                "doc_id": doc_id,
-                "source": filename,
-                "pair_index": i,
-                "question": p["question"].strip(),
-                "answer": p["answer"].strip(),
-            }
-            for i, p in enumerate(pairs)
-        ]
-        ids = self.vs.add_texts(questions, metadatas)
-        self.registry.register(doc_id, "qa", filename, len(ids))
-        return doc_id, len(ids)
+        batch_size = get_ingest_batch_size()
+        pairs_iter = iter(pairs)
+        count = 0
+        try:
+            while True:
+                batch = list(islice(pairs_iter, batch_size))
+                if not batch:
+                    break
+                questions = [p["question"].strip() for p in batch]
+                metadatas = [
+                    {
+                        "type": "qa",
+                        "doc_id": doc_id,
+                        "source": filename,
+                        "pair_index": count + i,
+                        "question": p["question"].strip(),
+                        "answer": p["answer"].strip(),
+                    }
+                    for i, p in enumerate(batch)
+                ]
+                count += len(self.vs.add_texts(questions, metadatas))
+        except Exception:
+            if count:
+                self.vs.delete_by_doc_id(doc_id)
+            raise
+        if not count:
+            raise ValueError("No Q&A pairs found in uploaded document.")
+        self.registry.register(doc_id, "qa", filename, count)
+        return doc_id, count
 
     def retrieve(self, query: str, top_k: int = 8):
         return self.vs.query(query, top_k=top_k)
@@ -84,6 +130,18 @@ class RAGPipeline:
             f"{context}\n\nQuestion: {user_query}"
         )
 
+    @staticmethod
+    def build_retrieval_fallback(doc_chunks: List[str], qa_pairs: List[Tuple[str, str]]) -> str:
+        """Answer from retrieved context only, used when the LLM queue sheds a request."""
+        if not doc_chunks and not qa_pairs:
+            return "Not in policy"
+        parts = ["The assistant is busy; showing the closest matches from your documents instead."]
+        if qa_pairs:
+            parts.append("Approved Q&A:\n" + "\n\n".join([f"Q: {q}\nA: {a}" for q, a in qa_pairs]))
+        if doc_chunks:
+            parts.append("Policy excerpts:\n" + "\n---\n".join(doc_chunks))
+        return "\n\n".join(parts)
+
     @staticmethod
     def call_perplexity(final_prompt: str) -> str:
         api_key = get_perplexity_api_key()
@@ -119,7 +177,12 @@ class RAGPipeline:
             # Fallback if the schema differs
             return str(data)
 
-    def query(self, user_query: str) -> str:
+    def plan(self, user_query: str) -> tuple[str | None, str, List[str], List[Tuple[str, str]]]:
+        """Retrieve context for a query.
+
+        Returns (answer, prompt, doc_contexts, qa_contexts); `answer` is set when a
+        confident QA hit makes the LLM call unnecessary.
+        """
         results = self.retrieve(user_query, top_k=8)
         qa_hits = [r for r in results if (r.get("metadata") or {}).get("type") == "qa"]
         qa_hits.sort(key=lambda r: (r.get("similarity") or 0.0), reverse=True)
@@ -130,7 +193,7 @@ class RAGPipeline:
             meta = qa_hits[0].get("metadata") or {}
             answer = meta.get("answer")
             if answer:
-                return answer
+                return answer, "", [], []
 
         doc_contexts = [r.get("text", "") for r in doc_hits[:3] if r.get("text")]
         qa_contexts = []
@@ -141,5 +204,37 @@ class RAGPipeline:
             if q and a:
                 qa_contexts.append((q, a))
 
-        final_prompt = self.build_prompt(doc_contexts, qa_contexts, user_query)
-        return self.call_perplexity(final_prompt)
+        return None, self.build_prompt(doc_contexts, qa_contexts, user_query), doc_contexts, qa_contexts
+
+    def query(self, user_query: str, priority: str = "interactive") -> str:
+        """Answer from a confident QA hit, else via Perplexity.
+
+        LLM calls go through the scheduler; if a request is not admitted before
+        its queue deadline, a retrieval-only answer is returned instead.
+        """
+        answer, final_prompt, doc_contexts, qa_contexts = self.plan(user_query)
+        if answer is not None:
+            return answer
+        try:
+            with self.scheduler.slot(priority, timeout=get_llm_queue_timeout(priority)):
+                return self.call_perplexity(final_prompt)
+        except QueueTimeout:
+            return self.build_retrieval_fallback(doc_contexts, qa_contexts)
+
+    async def aquery(self, user_query: str, priority: str = "interactive") -> str:
+        """Async `query` for the API: waits for admission on the event loop.
+
+        Only retrieval and the admitted LLM call run in worker threads, so
+        queued requests don't hold threads other endpoints need.
+        """
+        answer, final_prompt, doc_contexts, qa_contexts = await asyncio.to_thread(self.plan, user_query)
+        if answer is not None:
+            return answer
+        try:
+            await self.scheduler.acquire_async(priority, timeout=get_llm_queue_timeout(priority))
+        except QueueTimeout:
+            return self.build_retrieval_fallback(doc_contexts, qa_contexts)
+        try:
+            return await asyncio.to_thread(self.call_perplexity, final_prompt)
+        finally:
+            self.scheduler.release()
@@ -48,6 +48,9 @@ class DocumentRegistry:
             del data[doc_id]
             self._save(data)
 
+    def clear(self) -> None:
+        self._save({})
+
     def list(self) -> List[Dict[str, Any]]:
         data = self._load()
         # Return newest first
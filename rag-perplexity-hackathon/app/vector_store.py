@@ -1,39 +1,101 @@
 import os
+import threading
 import uuid
 from typing import List, Dict, Any
 
 import chromadb
 from chromadb.utils import embedding_functions
 
-from .config import get_chroma_dir
+from .config import (
+    get_chroma_dir,
+    get_compaction_min_deleted,
+    get_compaction_threshold,
+    get_ingest_batch_size,
+)
+from .doc_index import DocIdIndex
 
 # Resolve a stable on-disk path for Chroma persistence
 DB_DIR = get_chroma_dir()
 os.makedirs(DB_DIR, exist_ok=True)
 
 
+def _batches(items: List[str], size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
 class VectorStore:
     """Wrapper around a persistent ChromaDB collection.
 
     - Uses SentenceTransformer "all-MiniLM-L6-v2" for embeddings
     - Persists to configured ./db folder
+    - Keeps a doc_id -> vector ids index so deletes target exact ids
+    - Rebuilds the collection in the background once enough vectors have been
+      deleted; queries keep using the old collection until an atomic swap
     """
 
-    def __init__(self, collection_name: str = "documents") -> None:
+    def __init__(
+        self,
+        collection_name: str = "documents",
+        path: str | None = None,
+        embedding_fn: Any = None,
+    ) -> None:
         self.collection_name = collection_name
-        self.client = chromadb.PersistentClient(path=DB_DIR)
-        self.embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
+        self.path = path or DB_DIR
+        self.client = chromadb.PersistentClient(path=self.path)
+        self.embedding_fn = embedding_fn or embedding_functions.SentenceTransformerEmbeddingFunction(
             model_name="all-MiniLM-L6-v2"
         )
-        self._ensure_collection()
+        # Writers (add/delete/clear/swap) take _write_lock; queries never do
+        self._write_lock = threading.RLock()
+        self._readers = threading.Condition()
+        self._active_readers: Dict[str, int] = {}
+        self._compacting = False
+        self._journal_added: List[str] = []
+        self._journal_deleted: List[str] = []
+        self._generation = 0
+
+        self.index = DocIdIndex(
+            os.path.join(self.path, "vector_index.sqlite3"), default_collection=collection_name
+        )
+        self._ensure_collection(self.index.collection)
+        if not self.index.exists:
+            self._rebuild_index()
+        self._drop_orphaned_collections()
+
+    def _drop_orphaned_collections(self) -> None:
+        """Delete rebuilt collections left behind by a compaction that crashed."""
+        prefix = f"{self.collection_name}-"
+        for collection in self.client.list_collections():
+            name = getattr(collection, "name", collection)
+            if name.startswith(prefix) and name != self.collection.name:
+                try:
+                    self.client.delete_collection(name)
+                except Exception as e:
+                    print(f"[compaction] Failed to drop orphaned collection '{name}': {e}")
 
-    def _ensure_collection(self) -> None:
+    def _ensure_collection(self, name: str | None = None) -> None:
         self.collection = self.client.get_or_create_collection(
-            name=self.collection_name,
+            name=name or self.collection_name,
             embedding_function=self.embedding_fn,
             metadata={"hnsw:space": "cosine"},
         )
 
+    def _rebuild_index(self) -> None:
+        """One-time scan of collection metadata to build the doc_id index."""
+        docs: Dict[str | None, List[str]] = {}
+        batch_size = get_ingest_batch_size()
+        offset = 0
+        while True:
+            page = self.collection.get(limit=batch_size, offset=offset, include=["metadatas"])
+            ids = page.get("ids") or []
+            if not ids:
+                break
+            for _id, meta in zip(ids, page.get("metadatas") or []):
+                docs.setdefault((meta or {}).get("doc_id") or None, []).append(_id)
+            offset += len(ids)
+        self.index.replace(docs, collection=self.collection.name)
+
     def add_texts(
         self,
         texts: List[str],
@@ -47,17 +109,37 @@ class VectorStore:
             raise ValueError("metadatas length must match texts length")
 
         ids = [str(uuid.uuid4()) for _ in texts]
-        self.collection.add(ids=ids, documents=texts, metadatas=metadatas)
+        # Embed before taking the write lock so deletes and clears aren't blocked on the model
+        embeddings = self.embedding_fn(texts)
+        with self._write_lock:
+            self.collection.add(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+            # Vectors without a doc_id are tracked too (doc_id None) so compaction keeps them
+            by_doc: Dict[str | None, List[str]] = {}
+            for _id, meta in zip(ids, metadatas):
+                by_doc.setdefault((meta or {}).get("doc_id") or None, []).append(_id)
+            for doc_id, doc_ids in by_doc.items():
+                self.index.add(doc_id, doc_ids)
+            if self._compacting:
+                self._journal_added.extend(ids)
         return ids
 
     def query(self, text: str, top_k: int = 3) -> List[Dict[str, Any]]:
         if not text.strip():
             return []
-        result = self.collection.query(
-            query_texts=[text],
-            n_results=top_k,
-            include=["documents", "metadatas", "distances", "ids"],
-        )
+        # Pin the current collection so a concurrent swap doesn't drop it mid-query
+        with self._readers:
+            collection = self.collection
+            self._active_readers[collection.name] = self._active_readers.get(collection.name, 0) + 1
+        try:
+            result = collection.query(
+                query_texts=[text],
+                n_results=top_k,
+                include=["documents", "metadatas", "distances"],
+            )
+        finally:
+            with self._readers:
+                self._active_readers[collection.name] -= 1
+                self._readers.notify_all()
         docs = result.get("documents", [[]])[0]
         metas = result.get("metadatas", [[]])[0]
         dists = result.get("distances", [[]])[0]
@@ -81,13 +163,121 @@ class VectorStore:
 
     def delete_by_doc_id(self, doc_id: str) -> None:
         """Delete all vectors that belong to a specific document id."""
-        self.collection.delete(where={"doc_id": doc_id})
+        with self._write_lock:
+            if self.index.has_doc(doc_id):
+                ids = self.index.pop(doc_id)
+                for batch in _batches(ids, get_ingest_batch_size()):
+                    self.collection.delete(ids=batch)
+                if self._compacting:
+                    self._journal_deleted.extend(ids)
+            else:
+                # Not tracked by the index (should not happen after migration)
+                self.collection.delete(where={"doc_id": doc_id})
+        self._maybe_start_compaction()
 
     def clear(self) -> None:
         """Delete and recreate the collection (clears all vectors)."""
+        with self._write_lock:
+            # Any in-progress compaction is discarded at swap time
+            self._generation += 1
+            try:
+                self.client.delete_collection(self.collection.name)
+            except Exception:
+                # If it doesn't exist or other benign errors, ignore
+                pass
+            self._ensure_collection()
+            self.index.replace({}, collection=self.collection.name)
+
+    def stats(self) -> Dict[str, Any]:
+        deleted = self.index.deleted
+        live = self.index.live_count()
+        total = live + deleted
+        return {
+            "collection": self.index.collection,
+            "live_vectors": live,
+            "deleted_vectors": deleted,
+            "deleted_fraction": deleted / total if total else 0.0,
+            "compacting": self._compacting,
+        }
+
+    def _maybe_start_compaction(self) -> None:
+        stats = self.stats()
+        if stats["deleted_vectors"] < get_compaction_min_deleted():
+            return
+        if stats["deleted_fraction"] < get_compaction_threshold():
+            return
+        self.start_compaction()
+
+    def start_compaction(self) -> threading.Thread | None:
+        """Rebuild the collection in a background thread.
+
+        Returns the thread, or None if a compaction is already running.
+        """
+        with self._write_lock:
+            if self._compacting:
+                return None
+            self._compacting = True
+            self._journal_added = []
+            self._journal_deleted = []
+            generation = self._generation
+            old = self.collection
+        thread = threading.Thread(
+            target=self._compact, args=(old, generation), name="vector-compaction", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _copy_ids(self, source: Any, target: Any, ids: List[str]) -> None:
+        """Copy vectors by id, reusing stored embeddings instead of re-embedding."""
+        for batch in _batches(ids, get_ingest_batch_size()):
+            page = source.get(ids=batch, include=["embeddings", "documents", "metadatas"])
+            if not page.get("ids"):
+                continue
+            target.upsert(
+                ids=page["ids"],
+                embeddings=page["embeddings"],
+                documents=page["documents"],
+                metadatas=page["metadatas"],
+            )
+
+    def _compact(self, old: Any, generation: int) -> None:
+        new_name = f"{self.collection_name}-{uuid.uuid4().hex[:8]}"
+        new = None
+        swapped = False
         try:
-            self.client.delete_collection(self.collection_name)
-        except Exception:
-            # If it doesn't exist or other benign errors, ignore
-            pass
-        self._ensure_collection()
+            new = self.client.create_collection(
+                name=new_name,
+                embedding_function=self.embedding_fn,
+                metadata={"hnsw:space": "cosine"},
+            )
+            # Bulk copy without blocking writers; their changes are journaled
+            self._copy_ids(old, new, self.index.all_ids())
+
+            with self._write_lock:
+                if generation != self._generation:
+                    return
+                # Replay writes made during the copy, then swap atomically
+                self._copy_ids(old, new, self._journal_added)
+                for batch in _batches(self._journal_deleted, get_ingest_batch_size()):
+                    new.delete(ids=batch)
+                with self._readers:
+                    self.collection = new
+                self.index.mark_compacted(new_name, len(self._journal_deleted))
+                swapped = True
+
+            # Drop the old collection once in-flight queries have finished with it
+            with self._readers:
+                self._readers.wait_for(lambda: not self._active_readers.get(old.name))
+            self.client.delete_collection(old.name)
+        except Exception as e:
+            print(f"[compaction] Failed to compact '{old.name}': {e}")
+        finally:
+            if new is not None and not swapped:
+                try:
+                    self.client.delete_collection(new_name)
+                except Exception:
+                    pass
+            with self._write_lock:
+                self._compacting = False
+                self._journal_added = []
+                self._journal_deleted = []
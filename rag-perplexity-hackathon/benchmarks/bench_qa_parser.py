@@ -0,0 +1,96 @@
+"""Compare Q&A parsing throughput: legacy regex vs line parser vs bulk formats.
+
+Run from the backend folder:
+
+    python -m benchmarks.bench_qa_parser --pairs 200000
+
+Only parsing is timed; embedding and vector writes are excluded so the numbers
+reflect the parser itself (end-to-end ingest is dominated by embedding cost,
+which is the same for every input format). Detection rows report elapsed time
+only, since detection stops after the first three pairs.
+"""
+import argparse
+import csv
+import io
+import json
+import re
+import time
+
+from app.qa_parser import iter_qa_csv, iter_qa_jsonl, iter_qa_pairs, is_qa_document
+
+# The previous whole-document regex, kept here only as a baseline
+_LEGACY_QA_REGEX = re.compile(
+    r"(?ims)^\s*(?:Q(?:uestion)?[:\-]\s*)(.+?)\s*(?:\n|\r\n)\s*(?:A(?:nswer)?[:\-]\s*)(.+?)(?=(?:\n\s*Q(?:uestion)?[:\-]\s*)|\Z)",
+)
+
+
+def _legacy_parse(text: str) -> int:
+    count = 0
+    for m in _LEGACY_QA_REGEX.finditer(text):
+        if m.group(1).strip() and m.group(2).strip():
+            count += 1
+    return count
+
+
+def _make_pairs(n: int) -> list[tuple[str, str]]:
+    return [
+        (
+            f"What is the waiting period for condition {i}?",
+            f"There is a waiting period of {i % 48} months.\nSubject to the Table of Benefits.",
+        )
+        for i in range(n)
+    ]
+
+
+def _to_text(pairs) -> str:
+    return "\n\n".join(f"Q: {q}\nA: {a}" for q, a in pairs)
+
+
+def _to_csv(pairs) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["question", "answer"])
+    writer.writerows(pairs)
+    return buf.getvalue().encode("utf-8")
+
+
+def _to_jsonl(pairs) -> bytes:
+    return "\n".join(json.dumps({"question": q, "answer": a}) for q, a in pairs).encode("utf-8")
+
+
+def _timed(label: str, fn, n_pairs: int) -> None:
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    rate = n_pairs / elapsed if elapsed else float("inf")
+    print(f"{label:<22} {count:>9} pairs  {elapsed:8.3f}s  {rate:12,.0f} pairs/s")
+
+
+def _timed_detect(label: str, fn) -> None:
+    start = time.perf_counter()
+    is_qa = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {'qa' if is_qa else 'not qa':>15}  {elapsed:8.3f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=100_000, help="number of synthetic Q&A pairs")
+    args = parser.parse_args()
+
+    pairs = _make_pairs(args.pairs)
+    text = _to_text(pairs)
+    csv_bytes = _to_csv(pairs)
+    jsonl_bytes = _to_jsonl(pairs)
+
+    _timed("legacy regex", lambda: _legacy_parse(text), args.pairs)
+    _timed("line parser", lambda: sum(1 for _ in iter_qa_pairs(text)), args.pairs)
+    _timed("csv", lambda: sum(1 for _ in iter_qa_csv(csv_bytes)), args.pairs)
+    _timed("jsonl", lambda: sum(1 for _ in iter_qa_jsonl(jsonl_bytes)), args.pairs)
+    # Detection answers a yes/no question, so only elapsed time is meaningful
+    _timed_detect("detect (legacy)", lambda: _legacy_parse(text) >= 3)
+    _timed_detect("detect (early stop)", lambda: is_qa_document(text))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from docx import Document
+
+from app import extraction
+from app.document_loader import extract_document, load_text
+
+
+def _make_pdf(page_texts, form=False):
+    """Build a minimal PDF with one line of Helvetica text per page.
+
+    With form=True each page only draws a Form XObject (`/X1 Do`) that holds
+    the text, as many PDF producers do.
+    """
+    n = len(page_texts)
+    per_page = 3 if form else 2
+    font_id = 3 + per_page * n
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (b" ".join(b"%d 0 R" % (3 + per_page * i) for i in range(n)), n),
+    ]
+    for i, text in enumerate(page_texts):
+        page_id = 3 + per_page * i
+        text_stream = b"BT /F1 12 Tf 72 720 Td (%s) Tj ET" % text.encode()
+        if form:
+            resources = b"<< /XObject << /X1 %d 0 R >> >>" % (page_id + 2)
+            content = b"q /X1 Do Q"
+        else:
+            resources = b"<< /Font << /F1 %d 0 R >> >>" % font_id
+            content = text_stream
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources %s /Contents %d 0 R >>" % (resources, page_id + 1)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        if form:
+            objects.append(
+                b"<< /Type /XObject /Subtype /Form /BBox [0 0 612 792] "
+                b"/Resources << /Font << /F1 %d 0 R >> >> /Length %d >>\nstream\n%s\nendstream"
+                % (font_id, len(text_stream), text_stream)
+            )
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (num, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXTRACTION_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(extraction, "_cache", None)
+    monkeypatch.setattr(extraction, "_pool", None)
+    yield
+    if extraction._pool is not None:
+        extraction._pool.shutdown()
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_pdf_pages_extracted_then_cached(monkeypatch, workers):
+    monkeypatch.setenv("EXTRACTION_WORKERS", workers)
+    pdf = _make_pdf(["Grace period", "Waiting period", "Grace period"])
+
+    first = extract_document(pdf, "policy.pdf")
+    assert [p.text for p in first.pages] == ["Grace period", "Waiting period", "Grace period"]
+    # Identical pages share a content hash, so the third page is a cache hit
+    assert [p.cached for p in first.pages] == [False, False, True]
+    assert first.summary()["pages"] == 3
+
+    again = extract_document(pdf, "copy.pdf")
+    assert all(p.cached for p in again.pages)
+    assert again.text == first.text
+
+    # A different file reuses pages it shares with earlier uploads
+    other = extract_document(_make_pdf(["Waiting period", "Room rent"]), "other.pdf")
+    assert [p.cached for p in other.pages] == [True, False]
+
+
+def test_form_xobject_pages_do_not_share_cache(monkeypatch):
+    monkeypatch.setenv("EXTRACTION_WORKERS", "1")
+    # Page content streams are identical (`/X1 Do`); only the forms differ
+    first = extract_document(_make_pdf(["Room rent capped"], form=True), "a.pdf")
+    second = extract_document(_make_pdf(["Cataract excluded"], form=True), "b.pdf")
+    assert first.pages[0].text == "Room rent capped"
+    assert second.pages[0].text == "Cataract excluded"
+    assert not second.pages[0].cached
+
+    again = extract_document(_make_pdf(["Room rent capped"], form=True), "c.pdf")
+    assert again.pages[0].cached
+    assert again.pages[0].text == "Room rent capped"
+
+
+def test_concurrent_uploads_share_the_pool(monkeypatch):
+    monkeypatch.setenv("EXTRACTION_WORKERS", "2")
+    pdfs = [_make_pdf([f"Upload {n} page {i}" for i in range(3)]) for n in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as uploads:
+        results = list(uploads.map(lambda pdf: extract_document(pdf, "upload.pdf"), pdfs))
+
+    for n, result in enumerate(results):
+        assert [p.text for p in result.pages] == [f"Upload {n} page {i}" for i in range(3)]
+    assert len(extraction.get_pool()._workers) <= 2
+
+
+def _hang_on_page_one(conn):
+    """Worker stand-in: page 1 never finishes, other pages return their index."""
+    conn.send(("ready",))
+    while True:
+        _, _, index = conn.recv()
+        if index == 1:
+            time.sleep(60)
+        conn.send(("ok", f"page {index}", 0.0))
+
+
+def test_hung_page_times_out_and_worker_is_replaced():
+    pool = extraction.ExtractionPool(1, target=_hang_on_page_one)
+    try:
+        assert pool.extract("file", b"", [0], timeout=5)[0].text == "page 0"
+        hung = pool._workers[0].process
+
+        results = pool.extract("file", b"", [1, 2], timeout=0.5)
+        assert results[1].timed_out and results[1].text == ""
+        # The only worker was stuck, so page 2 ran on its replacement
+        assert results[2].text == "page 2" and not results[2].timed_out
+        assert not hung.is_alive()
+        assert len(pool._workers) == 1 and pool._workers[0].process is not hung
+    finally:
+        pool.shutdown()
+
+
+def test_docx_cached_by_file_hash():
+    doc = Document()
+    doc.add_paragraph("Q: What is Foo?")
+    doc.add_paragraph("A: Bar.")
+    buf = io.BytesIO()
+    doc.save(buf)
+    content = buf.getvalue()
+
+    assert load_text(content, "qna.docx") == "Q: What is Foo?\nA: Bar."
+    result = extract_document(content, "qna.docx")
+    assert result.pages[0].cached
+    assert result.text == "Q: What is Foo?\nA: Bar."
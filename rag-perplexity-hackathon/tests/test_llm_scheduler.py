@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.llm_scheduler import LLMScheduler, QueueTimeout
+
+
+def test_interactive_admitted_before_batch():
+    sched = LLMScheduler(max_concurrency=1)
+    sched.acquire("interactive")  # occupy the only slot
+    order = []
+
+    def worker(priority):
+        with sched.slot(priority, timeout=5):
+            order.append(priority)
+
+    batch = threading.Thread(target=worker, args=("batch",))
+    batch.start()
+    time.sleep(0.05)
+    interactive = threading.Thread(target=worker, args=("interactive",))
+    interactive.start()
+    time.sleep(0.05)
+    assert sched.metrics()["queue_depth"] == 2
+
+    sched.release()
+    batch.join()
+    interactive.join()
+    assert order == ["interactive", "batch"]
+
+
+def test_queue_deadline_sheds_request():
+    sched = LLMScheduler(max_concurrency=1)
+    sched.acquire()
+    with pytest.raises(QueueTimeout):
+        sched.acquire("batch", timeout=0.05)
+    stats = sched.metrics()
+    assert stats["queue_depth"] == 0
+    assert stats["priorities"]["batch"]["shed"] == 1
+
+
+def test_token_bucket_limits_rate():
+    sched = LLMScheduler(max_concurrency=10, rate_per_sec=20, burst=1)
+    start = time.monotonic()
+    for _ in range(3):
+        sched.acquire(timeout=1)
+    # First call uses the burst token; the next two wait ~50ms each
+    assert time.monotonic() - start >= 0.09
+
+
+class _FakeVectorStore:
+    def __init__(self, results):
+        self.results = results
+
+    def query(self, text, top_k=3):
+        return self.results
+
+
+def _pipeline(results, scheduler):
+    from app.rag_pipeline import RAGPipeline
+
+    return RAGPipeline(registry=object(), scheduler=scheduler, vector_store=_FakeVectorStore(results))
+
+
+def test_query_falls_back_to_retrieval_when_queue_times_out(monkeypatch):
+    from app.rag_pipeline import RAGPipeline
+
+    monkeypatch.setenv("LLM_QUEUE_TIMEOUT_INTERACTIVE", "0.05")
+    monkeypatch.setattr(
+        RAGPipeline, "call_perplexity", staticmethod(lambda prompt: pytest.fail("LLM should not be called"))
+    )
+    sched = LLMScheduler(max_concurrency=1)
+    sched.acquire()  # saturate the only slot
+    results = [
+        {"text": "Room rent is capped at 1% of sum insured.", "metadata": {"type": "doc"}, "similarity": 0.4},
+        {
+            "text": "What is the grace period?",
+            "metadata": {"type": "qa", "question": "What is the grace period?", "answer": "Thirty days."},
+            "similarity": 0.5,
+        },
+    ]
+
+    answer = _pipeline(results, sched).query("How long is the grace period?")
+    assert "Q: What is the grace period?\nA: Thirty days." in answer
+    assert "Room rent is capped" in answer
+    assert sched.metrics()["priorities"]["interactive"]["shed"] == 1
+
+    assert _pipeline([], sched).query("Anything else?") == "Not in policy"
+
+
+def test_query_calls_llm_when_admitted(monkeypatch):
+    from app.rag_pipeline import RAGPipeline
+
+    monkeypatch.setattr(RAGPipeline, "call_perplexity", staticmethod(lambda prompt: "STUBBED"))
+    sched = LLMScheduler(max_concurrency=1)
+    assert _pipeline([], sched).query("Question?", priority="eval") == "STUBBED"
+    stats = sched.metrics()
+    assert stats["in_flight"] == 0
+    assert stats["priorities"]["eval"]["admitted"] == 1
+
+
+def test_async_queue_does_not_hold_threads(monkeypatch):
+    from app.rag_pipeline import RAGPipeline
+
+    calls = []
+    monkeypatch.setattr(RAGPipeline, "call_perplexity", staticmethod(lambda prompt: calls.append(prompt) or "ok"))
+    sched = LLMScheduler(max_concurrency=1)
+    sched.acquire()  # occupy the only slot
+    pipeline = _pipeline([], sched)
+    # More queued requests than the default 40-thread request threadpool
+    n_batch = 60
+
+    async def run():
+        batch = [asyncio.create_task(pipeline.aquery(f"batch {i}", "batch")) for i in range(n_batch)]
+        while sched.metrics()["queue_depth"] < n_batch:
+            await asyncio.sleep(0.01)
+        interactive = asyncio.create_task(pipeline.aquery("interactive", "interactive"))
+        while sched.metrics()["queue_depth"] < n_batch + 1:
+            await asyncio.sleep(0.01)
+        assert threading.active_count() < 40
+        sched.release()
+        await asyncio.gather(interactive, *batch)
+
+    asyncio.run(run())
+    assert "interactive" in calls[0]
+    assert len(calls) == n_batch + 1
+    assert sched.metrics()["in_flight"] == 0
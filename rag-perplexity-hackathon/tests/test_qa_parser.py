@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from app.qa_parser import (
+    is_qa_document,
+    iter_qa_csv,
+    iter_qa_jsonl,
+    iter_qa_pairs,
+    parse_qa_pairs,
+)
+
+
+def test_parse_multiline_pairs():
+    text = (
+        "Policy FAQ\n\n"
+        "Q: What is Foo?\nA: Bar.\n\n"
+        "Question: How long is the grace period?\n"
+        "Answer: Thirty days.\nRenewal keeps continuity.\n"
+    )
+    pairs = parse_qa_pairs(text)
+    assert pairs == [
+        {"question": "What is Foo?", "answer": "Bar."},
+        {
+            "question": "How long is the grace period?",
+            "answer": "Thirty days.\nRenewal keeps continuity.",
+        },
+    ]
+
+
+def test_is_qa_document_stops_early():
+    def lines():
+        for i in range(3):
+            yield f"Q: q{i}\n"
+            yield f"A: a{i}\n"
+        yield "Q: q3\n"
+        raise AssertionError("parser read past the third pair")
+
+    # Raises if detection reads past the line that completes the third pair
+    assert is_qa_document(lines())
+    assert is_qa_document("Q: a\nA: b\nQ: c\nA: d\nQ: e\nA: f\n")
+    assert not is_qa_document("Q: a\nA: b\nplain text")
+
+
+def test_bulk_csv_and_jsonl():
+    csv_bytes = b'Answer,Question\n"Bar, really.",What is Foo?\n,Empty answer\n'
+    assert list(iter_qa_csv(csv_bytes)) == [{"question": "What is Foo?", "answer": "Bar, really."}]
+
+    jsonl_bytes = (json.dumps({"question": "What is Foo?", "answer": "Bar."}) + "\n\n").encode()
+    assert list(iter_qa_jsonl(jsonl_bytes)) == [{"question": "What is Foo?", "answer": "Bar."}]
+
+    with pytest.raises(ValueError):
+        list(iter_qa_csv(b"q,a\nx,y\n"))
+    with pytest.raises(ValueError):
+        list(iter_qa_jsonl(b"{not json}\n"))
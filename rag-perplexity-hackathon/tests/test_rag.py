@@ -15,3 +15,27 @@ def test_clear():
     r = client.post("/clear")
     assert r.status_code == 200
     assert r.json().get("status") == "ok"
+
+
+def test_query_priority_and_metrics(monkeypatch):
+    from app import main
+    from app.llm_scheduler import LLMScheduler
+    from app.rag_pipeline import RAGPipeline
+
+    monkeypatch.setattr(RAGPipeline, "call_perplexity", staticmethod(lambda prompt: "STUBBED"))
+    monkeypatch.setattr(main.pipeline, "scheduler", LLMScheduler(max_concurrency=1))
+    monkeypatch.setattr(main.pipeline.vs, "query", lambda text, top_k=3: [])
+
+    r = client.post("/query", json={"query": "Unrelated question", "priority": "batch"})
+    assert r.status_code == 200
+    assert r.json().get("answer") == "STUBBED"
+
+    r = client.post("/query", json={"query": "Unrelated question", "priority": "urgent"})
+    assert r.status_code == 422
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    llm = r.json()["llm"]
+    assert llm["priorities"]["batch"]["admitted"] == 1
+    assert llm["queue_depth"] == 0
+    assert "vector_store" in r.json()
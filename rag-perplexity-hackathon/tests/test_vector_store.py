@@ -0,0 +1,150 @@
+import threading
+
+from chromadb.api.types import EmbeddingFunction
+
+from app.vector_store import VectorStore
+
+
+class _HashEmbedding(EmbeddingFunction):
+    """Deterministic toy embeddings so tests don't need a model download."""
+
+    def __init__(self) -> None:
+        pass
+
+    def __call__(self, input):
+        return [[float((hash(t) >> s) % 7 + 1) for s in range(8)] for t in input]
+
+    @staticmethod
+    def name() -> str:
+        return "test-hash"
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return _HashEmbedding()
+
+
+def _store(tmp_path):
+    return VectorStore(path=str(tmp_path), embedding_fn=_HashEmbedding())
+
+
+def _add_doc(vs, doc_id, n):
+    texts = [f"{doc_id} chunk {i}" for i in range(n)]
+    return vs.add_texts(texts, [{"doc_id": doc_id, "type": "doc"} for _ in texts])
+
+
+def test_delete_uses_index(tmp_path):
+    vs = _store(tmp_path)
+    _add_doc(vs, "a", 3)
+    kept = _add_doc(vs, "b", 2)
+
+    vs.delete_by_doc_id("a")
+    assert sorted(vs.collection.get()["ids"]) == sorted(kept)
+    assert vs.stats()["deleted_vectors"] == 3
+
+    # Index persists and is reloaded by a new instance
+    vs2 = _store(tmp_path)
+    assert sorted(vs2.index.all_ids()) == sorted(kept)
+
+
+def test_index_built_for_existing_collection(tmp_path):
+    vs = _store(tmp_path)
+    ids = _add_doc(vs, "a", 2)
+    (tmp_path / "vector_index.sqlite3").unlink()
+
+    vs2 = _store(tmp_path)
+    assert sorted(vs2.index.all_ids()) == sorted(ids)
+
+
+def test_compaction_swaps_collection(tmp_path, monkeypatch):
+    vs = _store(tmp_path)
+    _add_doc(vs, "a", 6)
+    kept = _add_doc(vs, "b", 4)
+    old_name = vs.collection.name
+
+    # Hold the bulk copy open so writes land while the rebuild is in progress
+    copy_started, release_copy = threading.Event(), threading.Event()
+    copy_ids = vs._copy_ids
+
+    def slow_copy(source, target, ids):
+        if not copy_started.is_set():
+            copy_started.set()
+            release_copy.wait(timeout=10)
+        copy_ids(source, target, ids)
+
+    monkeypatch.setattr(vs, "_copy_ids", slow_copy)
+    thread = vs.start_compaction()
+    assert copy_started.wait(timeout=10)
+    assert vs.start_compaction() is None
+
+    # Writes during the rebuild are journaled and replayed before the swap
+    added = _add_doc(vs, "c", 2)
+    vs.delete_by_doc_id("a")
+    assert vs.collection.name == old_name
+    release_copy.set()
+    thread.join(timeout=30)
+
+    assert vs.collection.name != old_name
+    assert sorted(vs.collection.get()["ids"]) == sorted(kept + added)
+    assert old_name not in [c.name for c in vs.client.list_collections()]
+    assert vs.stats()["compacting"] is False
+    assert vs.query("b chunk 1", top_k=1)
+
+
+def test_compaction_keeps_vectors_without_doc_id(tmp_path):
+    vs = _store(tmp_path)
+    _add_doc(vs, "a", 3)
+    loose = vs.add_texts(["no doc id"], [{"source": "x"}]) + vs.add_texts(["empty doc id"], [{"doc_id": ""}])
+    vs.delete_by_doc_id("a")
+
+    vs.start_compaction().join(timeout=30)
+    assert sorted(vs.collection.get()["ids"]) == sorted(loose)
+
+
+class _SlowEmbedding(_HashEmbedding):
+    """Blocks while embedding until released, once `armed` is set."""
+
+    def __init__(self) -> None:
+        self.armed = threading.Event()
+        self.embedding = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, input):
+        if self.armed.is_set():
+            self.embedding.set()
+            self.release.wait(5)
+        return super().__call__(input)
+
+
+def test_delete_not_blocked_by_embedding(tmp_path):
+    slow = _SlowEmbedding()
+    vs = VectorStore(path=str(tmp_path), embedding_fn=slow)
+    _add_doc(vs, "a", 2)
+
+    slow.armed.set()
+    writer = threading.Thread(target=_add_doc, args=(vs, "b", 2))
+    writer.start()
+    assert slow.embedding.wait(5)
+    # The add is still embedding; the delete must not wait for it
+    deleter = threading.Thread(target=vs.delete_by_doc_id, args=("a",))
+    deleter.start()
+    deleter.join(2)
+    assert not deleter.is_alive()
+    slow.release.set()
+    writer.join()
+    assert vs.stats()["live_vectors"] == 2
+
+
+def test_orphaned_compaction_collections_dropped(tmp_path):
+    vs = _store(tmp_path)
+    _add_doc(vs, "a", 2)
+    # As if compaction crashed after creating its rebuilt collection
+    vs.client.create_collection("documents-deadbeef", embedding_function=vs.embedding_fn)
+    vs.client.create_collection("other", embedding_function=vs.embedding_fn)
+
+    vs2 = _store(tmp_path)
+    names = {c.name for c in vs2.client.list_collections()}
+    assert names == {"documents", "other"}
+    assert vs2.stats()["live_vectors"] == 2